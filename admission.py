@@ -0,0 +1,133 @@
+# Necessary imports: json for the rejection body, os for configuration, threading and time for the queues, and flask for the hooks.
+import json
+import os
+import threading
+import time
+
+from flask import g, request, Response
+
+# Cost classes: how many requests of the class run at once, how many may wait for a slot, how long they
+# wait before being shed, and the Retry-After sent with a rejection.
+COST_CLASSES = {
+    'heavy': {'concurrency': 2, 'queue': 4, 'timeout': 2.0, 'retry_after': 2},
+    'medium': {'concurrency': 8, 'queue': 16, 'timeout': 1.0, 'retry_after': 1},
+    'light': {'concurrency': 32, 'queue': 64, 'timeout': 0.5, 'retry_after': 1}
+}
+
+# Cost class of each endpoint. Whole-dataset and team aggregates are heavy, per-player summaries and
+# index lookups are medium, and catalog lookups are light. Unlisted /api/ paths are medium.
+ENDPOINT_CLASSES = {
+    '/api/allseasons': 'heavy',
+    '/api/season': 'heavy',
+    '/api/teamallseasons': 'heavy',
+    '/api/teamseason': 'heavy',
+    '/api/teamvsteamallseasons': 'heavy',
+    '/api/teamvsteamseason': 'heavy',
+    '/api/query': 'heavy',
+    '/api/seasons/compare': 'heavy',
+    '/api/teamseasons/compare': 'heavy',
+    '/api/teamsperseason': 'light',
+    '/api/teamsperteam': 'light',
+    '/api/teamsperseasonteam': 'light',
+    '/api/batsmenperallseasons': 'light',
+    '/api/batsmenperseason': 'light',
+    '/api/bowlersperallseasons': 'light',
+    '/api/bowlersperseason': 'light',
+    '/api/venues': 'light',
+    '/api/search': 'light',
+    '/api/chase': 'light'
+}
+
+DEFAULT_CLASS = 'medium'
+
+# Admission control is on unless IPL_ADMISSION=0.
+ENABLED = os.environ.get('IPL_ADMISSION', '1') != '0'
+
+
+# Bounded concurrency with a bounded wait queue. A request that finds the queue full, or waits longer
+# than the timeout, is rejected straight away instead of tying up a worker.
+class CostClass:
+    def __init__(self, name, concurrency, queue, timeout, retry_after):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue = queue
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.condition = threading.Condition()
+
+    def acquire(self):
+        with self.condition:
+            if self.active < self.concurrency:
+                return self.admit()
+            if self.waiting >= self.queue:
+                return self.reject()
+
+            self.waiting += 1
+            try:
+                deadline = time.monotonic() + self.timeout
+                while self.active >= self.concurrency:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return self.reject()
+                    self.condition.wait(remaining)
+                return self.admit()
+            finally:
+                self.waiting -= 1
+
+    # Both called with the condition held.
+    def admit(self):
+        self.active += 1
+        self.admitted += 1
+        return True
+
+    def reject(self):
+        self.rejected += 1
+        return False
+
+    def release(self):
+        with self.condition:
+            self.active -= 1
+            self.condition.notify()
+
+    def status(self):
+        with self.condition:
+            return {'active': self.active, 'waiting': self.waiting, 'admitted': self.admitted, 'rejected': self.rejected}
+
+
+# Cost class for a request path.
+def costClass(path):
+    return ENDPOINT_CLASSES.get(path, DEFAULT_CLASS)
+
+
+# Admit each /api/ request through its endpoint's cost class and shed it with a 503 when the class is saturated.
+# Returns the cost classes by name, which are also kept in app.extensions['admission'].
+def enableAdmission(app, classes=None):
+    settings = classes if classes is not None else COST_CLASSES
+    cost_classes = {name: CostClass(name, **limits) for name, limits in settings.items()}
+    app.extensions['admission'] = cost_classes
+
+    @app.before_request
+    def admit():
+        if not request.path.startswith('/api/'):
+            return None
+        cost_class = cost_classes[costClass(request.path)]
+        if cost_class.acquire():
+            g.cost_class = cost_class
+            return None
+
+        body = json.dumps({'error': f"Too many '{cost_class.name}' requests in progress"})
+        response = Response(body, status=503, mimetype='application/json')
+        response.headers['Retry-After'] = str(cost_class.retry_after)
+        return response
+
+    @app.teardown_request
+    def release(exception=None):
+        cost_class = g.pop('cost_class', None)
+        if cost_class is not None:
+            cost_class.release()
+
+    return cost_classes
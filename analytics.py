@@ -0,0 +1,208 @@
+# Analytics endpoints built on the in-memory frames and the indexes derived from them.
+import json
+from flask import Blueprint, request, Response
+from startup import LazyModule
+
+# Resolved on first use; the app's background loader imports them before any request gets here.
+matchups = LazyModule('matchups')
+phases = LazyModule('phases')
+form = LazyModule('form')
+venues = LazyModule('venues')
+query = LazyModule('query')
+search = LazyModule('search')
+compare = LazyModule('compare')
+chase = LazyModule('chase')
+
+analytics = Blueprint('analytics', __name__)
+
+# JSON error response for a request the analytics functions reject, e.g. an unknown filter (400).
+def errorResponse(message, status):
+    return Response(json.dumps({'error': message}), status=status, mimetype='application/json')
+
+# Define an endpoint to get a batsman's record against a specific bowler.
+@analytics.route('/api/batsmanvsbowler')
+def batsmanVsBowler():
+    batsman = request.args.get('batsman')
+    bowler = request.args.get('bowler')
+    response = matchups.batsmanVsBowlerAPI(batsman, bowler)
+    return response
+
+# Define an endpoint to get the bowlers who have dismissed a batsman most often.
+@analytics.route('/api/batsmannemeses')
+def batsmanNemeses():
+    batsman = request.args.get('batsman')
+    k = request.args.get('k', 5)
+    try:
+        response = matchups.batsmanNemesesAPI(batsman, k)
+    except ValueError as error:
+        return errorResponse(str(error), 400)
+    return response
+
+# Define an endpoint to get the batsmen a bowler has dismissed most often.
+@analytics.route('/api/bowlerbunnies')
+def bowlerBunnies():
+    bowler = request.args.get('bowler')
+    k = request.args.get('k', 5)
+    try:
+        response = matchups.bowlerBunniesAPI(bowler, k)
+    except ValueError as error:
+        return errorResponse(str(error), 400)
+    return response
+
+# Define an endpoint to get a team's batting and bowling numbers by phase of the innings.
+@analytics.route('/api/teamphases')
+def teamPhases():
+    team = request.args.get('team')
+    season = request.args.get('season')
+    start = request.args.get('start')  # Optional custom over range.
+    end = request.args.get('end')
+    try:
+        response = phases.teamPhasesAPI(team, season, start, end)
+    except ValueError as error:
+        return errorResponse(str(error), 400)
+    return response
+
+# Define an endpoint to get every team's batting numbers by phase for a season.
+@analytics.route('/api/seasonphases')
+def seasonPhases():
+    season = request.args.get('season')
+    start = request.args.get('start')
+    end = request.args.get('end')
+    try:
+        response = phases.seasonPhasesAPI(season, start, end)
+    except ValueError as error:
+        return errorResponse(str(error), 400)
+    return response
+
+# Define an endpoint to get a batsman's numbers by phase of the innings.
+@analytics.route('/api/batsmanphases')
+def batsmanPhases():
+    batsman = request.args.get('batsman')
+    season = request.args.get('season')
+    start = request.args.get('start')
+    end = request.args.get('end')
+    try:
+        response = phases.batsmanPhasesAPI(batsman, season, start, end)
+    except ValueError as error:
+        return errorResponse(str(error), 400)
+    return response
+
+# Define an endpoint to get a bowler's numbers by phase of the innings.
+@analytics.route('/api/bowlerphases')
+def bowlerPhases():
+    bowler = request.args.get('bowler')
+    season = request.args.get('season')
+    start = request.args.get('start')
+    end = request.args.get('end')
+    try:
+        response = phases.bowlerPhasesAPI(bowler, season, start, end)
+    except ValueError as error:
+        return errorResponse(str(error), 400)
+    return response
+
+# Define an endpoint to get a batsman's form over their last N innings, optionally as of a date.
+@analytics.route('/api/batsmanform')
+def batsmanForm():
+    batsman = request.args.get('batsman')
+    innings = request.args.get('innings', 10)
+    date = request.args.get('date')
+    try:
+        response = form.batsmanFormAPI(batsman, innings, date)
+    except ValueError as error:
+        return errorResponse(str(error), 400)
+    return response
+
+# Define an endpoint to get a bowler's form over their last N innings, optionally as of a date.
+@analytics.route('/api/bowlerform')
+def bowlerForm():
+    bowler = request.args.get('bowler')
+    innings = request.args.get('innings', 10)
+    date = request.args.get('date')
+    try:
+        response = form.bowlerFormAPI(bowler, innings, date)
+    except ValueError as error:
+        return errorResponse(str(error), 400)
+    return response
+
+# Define an endpoint to get all venues.
+@analytics.route('/api/venues')
+def allVenues():
+    response = venues.venuesAPI()
+    return response
+
+# Define an endpoint to get the report for a specific venue.
+@analytics.route('/api/venue')
+def venue():
+    venue = request.args.get('venue')
+    try:
+        response = venues.venueAPI(venue)
+    except KeyError as error:
+        return errorResponse(error.args[0], 404)
+    return response
+
+# Define an endpoint to run an ad-hoc query over the deliveries.
+# Every parameter other than 'metric' and 'groupby' is a filter; repeat a parameter to match any of several values.
+@analytics.route('/api/query')
+def adHocQuery():
+    filters = request.args.to_dict(flat=False)
+    metric = filters.pop('metric', ['runs'])[0]
+    groupby = filters.pop('groupby', [None])[0]
+    try:
+        response = query.queryAPI(filters, metric, groupby)
+    except ValueError as error:
+        return errorResponse(str(error), 400)
+    return response
+
+# Define an endpoint to search player and team names.
+@analytics.route('/api/search')
+def searchNames():
+    q = request.args.get('q')
+    limit = request.args.get('limit', 10)
+    try:
+        response = search.searchAPI(q, limit)
+    except ValueError as error:
+        return errorResponse(str(error), 400)
+    return response
+
+# Define an endpoint to compare the overall metrics of several seasons (comma-separated; all when omitted).
+@analytics.route('/api/seasons/compare')
+def seasonsCompare():
+    seasons = request.args.get('seasons')
+    try:
+        response = compare.seasonsCompareAPI(seasons)
+    except ValueError as error:
+        return errorResponse(str(error), 400)
+    return response
+
+# Define an endpoint to compare a team's metrics across several seasons (comma-separated; all when omitted).
+@analytics.route('/api/teamseasons/compare')
+def teamSeasonsCompare():
+    team = request.args.get('team')
+    seasons = request.args.get('seasons')
+    try:
+        response = compare.teamSeasonsCompareAPI(team, seasons)
+    except ValueError as error:
+        return errorResponse(str(error), 400)
+    return response
+
+# Define an endpoint to get how often chasing teams won from a given state.
+@analytics.route('/api/chase')
+def chaseState():
+    runs = request.args.get('runs')
+    balls = request.args.get('balls')
+    wickets = request.args.get('wickets')
+    try:
+        response = chase.chaseAPI(runs, balls, wickets)
+    except ValueError as error:
+        return errorResponse(str(error), 400)
+    return response
+
+# Define an endpoint to get the chasing team's ball-by-ball win-probability curve for a historical match.
+@analytics.route('/api/winprobability')
+def winProbability():
+    match_id = request.args.get('id')
+    try:
+        response = chase.winProbabilityAPI(match_id)
+    except KeyError as error:
+        return errorResponse(error.args[0], 404)
+    return response
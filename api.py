@@ -3,30 +3,20 @@ import numpy as np
 import pandas as pd
 import json
 
-# Loading the datasets into pandas DataFrames.
-ball_with_match = pd.read_csv('datasets/ball_with_match_cleaned.csv')
-matches = pd.read_csv('datasets/matches_cleaned.csv')
+import dataset
+import parallel
+from encoder import NpEncoder
 
-
-# Custom JSON encoder to handle NumPy-specific data types that are not serializable in default JSON encoding.
-class NpEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, np.integer):
-            return int(obj)
-        if isinstance(obj, np.floating):
-            return float(obj)
-        if isinstance(obj, np.ndarray):
-            return obj.tolist()
-        return super(NpEncoder, self).default(obj)
+# Every function reads the datasets and the catalog from the current dataset snapshot (see dataset.py),
+# fetched once per call, so a reload never changes the data under a call in progress.
 
 
 # Function to retrieve teams for a specific season.
 def teamsPerSeason(season):
-    # Filter rows corresponding to the given season.
-    df = ball_with_match[ball_with_match['Season'] == int(season)].copy()
+    catalog = dataset.current().catalog
 
-    # Extract and sort unique team names.
-    teams = df['Team1'].sort_values().unique().tolist()
+    # Look up the sorted team names for the given season.
+    teams = catalog.season_teams.get(int(season), [])
 
     # Structure the data for JSON.
     data = {
@@ -41,15 +31,10 @@ def teamsPerSeason(season):
 
 # Function to retrieve teams that a particular team has played against.
 def teamsPerTeam(team):
-    # Filter rows where the given team is either Team1 or Team2.
-    df = ball_with_match[(ball_with_match['Team1'] == team) | (ball_with_match['Team2'] == team)]
-
-    teams = []
+    catalog = dataset.current().catalog
 
-    # Extract teams that are different from the given team.
-    for i in sorted(df[df['BattingTeam'] != team]['BattingTeam'].sort_values().unique()):
-        if i != team:
-            teams.append(i)
+    # Look up the sorted opponents of the given team.
+    teams = catalog.team_opponents.get(team, [])
 
     data = {
         'teamsPerTeam': {
@@ -62,15 +47,10 @@ def teamsPerTeam(team):
 
 # Function to retrieve teams that a particular team has played against in a specific season.
 def teamsPerSeasonTeam(season, team):
-    # Filter rows based on the given season and team.
-    df = ball_with_match[(ball_with_match['Season'] == int(season)) & (
-                (ball_with_match['Team1'] == team) | (ball_with_match['Team2'] == team))]
-    teams = []
+    catalog = dataset.current().catalog
 
-    # Extract teams that are different from the given team.
-    for i in sorted(df[df['BattingTeam'] != team]['BattingTeam'].sort_values().unique()):
-        if i != team:
-            teams.append(i)
+    # Look up the sorted opponents of the given team in the given season.
+    teams = catalog.season_team_opponents.get((int(season), team), [])
 
     data = {
         'teamsPerSeasonTeam': {
@@ -83,8 +63,10 @@ def teamsPerSeasonTeam(season, team):
 
 # Function to retrieve names of batsmen across all seasons.
 def batsmenPerAllSeasons():
-    # Extract and sort unique batsman names.
-    batsmen_names = sorted(ball_with_match['batter'].unique())
+    catalog = dataset.current().catalog
+
+    # Sorted batsman names from the catalog.
+    batsmen_names = catalog.batsmen
 
     data = {
         'batsmenPerAllSeasons': {
@@ -97,11 +79,10 @@ def batsmenPerAllSeasons():
 
 # Function to retrieve names of batsmen for a specific season.
 def batsmenPerSeason(season):
-    # Filter rows based on the given season.
-    df = ball_with_match[ball_with_match['Season'] == int(season)]
+    catalog = dataset.current().catalog
 
-    # Extract and sort unique batsman names.
-    batsmen_names = sorted(df['batter'].unique())
+    # Look up the sorted batsman names for the given season.
+    batsmen_names = catalog.season_batsmen.get(int(season), [])
 
     data = {
         'batsmenPerSeason': {
@@ -114,8 +95,10 @@ def batsmenPerSeason(season):
 
 # Function to retrieve names of bowlers across all seasons.
 def bowlersPerAllSeasons():
-    # Extract and sort unique bowler names.
-    bowlers_names = sorted(ball_with_match['bowler'].unique())
+    catalog = dataset.current().catalog
+
+    # Sorted bowler names from the catalog.
+    bowlers_names = catalog.bowlers
 
     data = {
         'bowlersPerAllSeasons': {
@@ -128,11 +111,10 @@ def bowlersPerAllSeasons():
 
 # Function to retrieve names of bowlers for a specific season.
 def bowlersPerSeason(season):
-    # Filter rows based on the given season.
-    df = ball_with_match[ball_with_match['Season'] == int(season)]
+    catalog = dataset.current().catalog
 
-    # Extract and sort unique bowler names.
-    bowlers_names = sorted(df['bowler'].unique())
+    # Look up the sorted bowler names for the given season.
+    bowlers_names = catalog.season_bowlers.get(int(season), [])
 
     data = {
         'bowlersPerSeason': {
@@ -143,51 +125,120 @@ def bowlersPerSeason(season):
     return json.dumps(data, cls=NpEncoder)
 
 
+# Integer codes of the columns overallAllSeasonsAPI groups by, factorized once per dataset snapshot. Codes follow
+# the sorted order of the values, so groups keyed on them come out in the same order as pandas' groupby, and the
+# aggregates run as NumPy sorts and bincounts, which release the GIL, instead of groupbys on string columns.
+class GroupCodes:
+    def __init__(self, df):
+        self.codes, self.names = {}, {}
+        for column in ['ID', 'batter', 'bowler', 'BattingTeam', 'Team1', 'WinningTeam']:
+            self.codes[column], self.names[column] = pd.factorize(df[column], sort=True)
+
+        # Regular innings of matches with a result not decided by the D/L method.
+        self.completed = ((df['WonBy'] != 'NoResults') & (df['method'] != 'D/L') & df['innings'].isin([1, 2])).to_numpy()
+
+        # First delivery of each season's final.
+        final_rows = np.flatnonzero((df['MatchNumber'] == 'Final').to_numpy())
+        _, first = np.unique(df['Season'].to_numpy()[final_rows], return_index=True)
+        self.finals = final_rows[np.sort(first)]
+
+
+# Build the group codes once per dataset snapshot.
+dataset.register('group_codes', lambda snapshot: GroupCodes(snapshot.ball_with_match))
+
+
+# Sums of values per distinct key, in ascending key order like pandas' groupby, with the first position of each key.
+def groupSums(keys, values):
+    groups, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    return groups, first, np.bincount(inverse, weights=values, minlength=len(groups)).astype(np.int64)
+
+
+# Positions of values from largest to smallest, with ties in the same order as pandas' sort_values(ascending=False).
+def descendingOrder(values):
+    return (len(values) - 1 - np.argsort(values[::-1], kind='quicksort'))[::-1]
+
+
 def overallAllSeasonsAPI():
-    # Calculate the total number of unique seasons.
-    total_seasons_played = ball_with_match['Season'].unique().size
+    snapshot = dataset.current()
+    ball_with_match, catalog, group_codes = snapshot.ball_with_match, snapshot.catalog, snapshot.group_codes
+    codes, names = group_codes.codes, group_codes.names
+    n_matches = len(names['ID'])
 
-    # Calculate the total number of unique teams that played.
-    total_teams_played = ball_with_match['Team1'].unique().size
+    # Calculate the number of unique seasons, teams and matches.
+    def totals():
+        return np.unique(ball_with_match['Season'].to_numpy()).size, len(names['Team1']), n_matches
 
-    # Calculate the total number of unique matches.
-    total_matches_played = ball_with_match['ID'].unique().size
+    # Find the player with the highest total of a column in a single match and that total.
+    def bestInMatch(player, column):
+        groups, _, sums = groupSums(codes[player] * n_matches + codes['ID'], ball_with_match[column].to_numpy())
+        best = descendingOrder(sums)[0]
+        return names[player][groups[best] // n_matches], sums[best]
 
     # Find the batsman with the highest runs in a single match and the corresponding runs.
-    highest_runs_batsman_name = ball_with_match.groupby(['batter', 'ID'])['batsman_run'].sum().sort_values(ascending=False).head(1).index[0][0]
-    highest_runs = ball_with_match.groupby(['batter', 'ID'])['batsman_run'].sum().sort_values(ascending=False).head(1).values[0]
+    def highestRuns():
+        return bestInMatch('batter', 'batsman_run')
 
     # Find the bowler with the highest wickets in a single match and the corresponding wickets.
-    highest_wickets_bowler_name = ball_with_match.groupby(['bowler', 'ID'])['isWicketDelivery'].sum().sort_values(ascending=False).head(1).index[0][0]
-    highest_wickets = ball_with_match.groupby(['bowler', 'ID'])['isWicketDelivery'].sum().sort_values(ascending=False).head(1).values[0]
-
-    # Filter out matches with 'NoResults', those decided by the 'D/L' method, and innings other than 1st and 2nd.
-    min_max_df = ball_with_match[(ball_with_match['WonBy'] != 'NoResults') & (ball_with_match['method'] != 'D/L') & (ball_with_match['innings'].isin([1, 2]))]
-
-    # Calculate the total runs scored by each team in each innings of every match.
-    temp_df = min_max_df.groupby(['ID', 'innings', 'BattingTeam'])['total_run'].sum().reset_index()
+    def highestWickets():
+        return bestInMatch('bowler', 'isWicketDelivery')
 
     # Find the team with the highest and lowest score in a single match and the corresponding scores.
-    highest_team_score_name = temp_df.sort_values('total_run', ascending=False).iloc[0]['BattingTeam']
-    highest_team_score = temp_df.sort_values('total_run', ascending=False).iloc[0]['total_run']
+    def teamScores():
+        # Only completed matches not decided by the 'D/L' method, and only the 1st and 2nd innings.
+        rows = np.flatnonzero(group_codes.completed)
 
-    lowest_team_score_name = temp_df.sort_values('total_run').iloc[0]['BattingTeam']
-    lowest_team_score = temp_df.sort_values('total_run').iloc[0]['total_run']
+        # Calculate the total runs scored in each innings of every match.
+        keys = codes['ID'][rows] * 3 + ball_with_match['innings'].to_numpy()[rows]
+        _, first, scores = groupSums(keys, ball_with_match['total_run'].to_numpy()[rows])
+        batting_teams = names['BattingTeam'][codes['BattingTeam'][rows[first]]]
 
-    # Get a list of all unique teams.
-    teams = sorted(set(ball_with_match['Team1'].sort_values().unique().tolist() + ball_with_match['Team2'].sort_values().unique().tolist()))
+        highest = descendingOrder(scores)[0]
+        lowest = np.argsort(scores, kind='quicksort')[0]
+        return batting_teams[highest], scores[highest], batting_teams[lowest], scores[lowest]
+
+    # Find the top 5 players by the total of a column across all matches.
+    def topFive(player, column):
+        groups, _, sums = groupSums(codes[player], ball_with_match[column].to_numpy())
+        top = descendingOrder(sums)[:5]
+        return names[player][groups[top]].tolist(), sums[top].tolist()
 
     # Get top 5 batsmen based on total runs across all matches.
-    top_5_batsmen_names = ball_with_match.groupby('batter')['batsman_run'].sum().sort_values(ascending=False).head().index.tolist()
-    top_5_batsmen_runs = ball_with_match.groupby('batter')['batsman_run'].sum().sort_values(ascending=False).head().values.tolist()
+    def topBatsmen():
+        return topFive('batter', 'batsman_run')
 
     # Get top 5 bowlers based on total wickets taken across all matches.
-    top_5_bowlers_names = ball_with_match.groupby('bowler')['isWicketDelivery'].sum().sort_values(ascending=False).head().index.tolist()
-    top_5_bowlers_wickets = ball_with_match.groupby('bowler')['isWicketDelivery'].sum().sort_values(ascending=False).head().values.tolist()
+    def topBowlers():
+        return topFive('bowler', 'isWicketDelivery')
 
     # Get teams that won the finals and the number of times they won.
-    winning_teams_names = ball_with_match[ball_with_match['MatchNumber'] == 'Final'].drop_duplicates(subset=['Season']).groupby(['WinningTeam'])['WinningTeam'].count().sort_values(ascending=False).index.tolist()
-    winning_teams_titles = ball_with_match[ball_with_match['MatchNumber'] == 'Final'].drop_duplicates(subset=['Season']).groupby(['WinningTeam'])['WinningTeam'].count().sort_values(ascending=False).values.tolist()
+    def winningTeams():
+        winners = codes['WinningTeam'][group_codes.finals]
+        titles = np.bincount(winners[winners >= 0], minlength=len(names['WinningTeam']))
+        present = np.flatnonzero(titles)
+        order = present[descendingOrder(titles[present])]
+        return names['WinningTeam'][order].tolist(), titles[order].tolist()
+
+    # The aggregates are independent of each other, so they are evaluated concurrently.
+    results = parallel.runTasks({
+        'totals': totals,
+        'highestRuns': highestRuns,
+        'highestWickets': highestWickets,
+        'teamScores': teamScores,
+        'topBatsmen': topBatsmen,
+        'topBowlers': topBowlers,
+        'winningTeams': winningTeams
+    })
+
+    total_seasons_played, total_teams_played, total_matches_played = results['totals']
+    highest_runs_batsman_name, highest_runs = results['highestRuns']
+    highest_wickets_bowler_name, highest_wickets = results['highestWickets']
+    highest_team_score_name, highest_team_score, lowest_team_score_name, lowest_team_score = results['teamScores']
+    top_5_batsmen_names, top_5_batsmen_runs = results['topBatsmen']
+    top_5_bowlers_names, top_5_bowlers_wickets = results['topBowlers']
+    winning_teams_names, winning_teams_titles = results['winningTeams']
+
+    # Get a list of all unique teams.
+    teams = catalog.teams
 
     # Structure all the data for JSON response.
     data = {
@@ -226,6 +277,8 @@ def overallAllSeasonsAPI():
 
 
 def overallSeasonAPI(season):
+    ball_with_match = dataset.current().ball_with_match
+
     # Filter the dataframe for the specified season.
     df = ball_with_match[ball_with_match['Season'] == int(season)].copy()
 
@@ -307,6 +360,8 @@ def overallSeasonAPI(season):
     return json.dumps(data, cls=NpEncoder)
 
 def teamAllSeasonsAPI(team):
+    ball_with_match = dataset.current().ball_with_match
+
     # Filter the dataframe for matches where the specified team participated.
     df = ball_with_match[(ball_with_match['Team1'] == team) | (ball_with_match['Team2'] == team)].copy()
 
@@ -385,6 +440,8 @@ def teamAllSeasonsAPI(team):
     return json.dumps(data, cls=NpEncoder)
 
 def teamSeasonAPI(team, season):
+    ball_with_match = dataset.current().ball_with_match
+
     # Filter the dataframe for matches where the specified team participated in the specified season.
     df = ball_with_match[((ball_with_match['Team1'] == team) | (ball_with_match['Team2'] == team)) & (ball_with_match['Season'] == int(season))].copy()
 
@@ -469,6 +526,8 @@ def teamSeasonAPI(team, season):
     return json.dumps(data, cls=NpEncoder)
 
 def teamVsTeamAllSeasonsAPI(team1, team2):
+    ball_with_match = dataset.current().ball_with_match
+
     # Filter the dataframe for matches where the specified teams played against each other.
     df = ball_with_match[((ball_with_match['Team1'] == team1) & (ball_with_match['Team2'] == team2)) | ((ball_with_match['Team1'] == team2) & (ball_with_match['Team2'] == team1))].copy()
 
@@ -551,6 +610,8 @@ def teamVsTeamAllSeasonsAPI(team1, team2):
     return json.dumps(data, cls=NpEncoder)
 
 def teamVsTeamSeasonAPI(team1, team2, season):
+    ball_with_match = dataset.current().ball_with_match
+
     # Filter the dataframe for matches where the specified teams played against each other in a given season.
     df = ball_with_match[(((ball_with_match['Team1'] == team1) & (ball_with_match['Team2'] == team2)) | ((ball_with_match['Team1'] == team2) & (ball_with_match['Team2'] == team1))) & (ball_with_match['Season'] == int(season))].copy()
 
@@ -637,6 +698,8 @@ def teamVsTeamSeasonAPI(team1, team2, season):
     return json.dumps(data, cls=NpEncoder)
 
 def batsmanAllSeasonsAPI(batsman):
+    ball_with_match = dataset.current().ball_with_match
+
     # Filter the dataframe to select data only for the specified batsman and valid innings.
     df = ball_with_match[(ball_with_match['batter'] == batsman) & ball_with_match['innings'].isin([1, 2])]
 
@@ -717,6 +780,8 @@ def batsmanAllSeasonsAPI(batsman):
     return json.dumps(data, cls=NpEncoder)
 
 def batsmanSeasonAPI(batsman, season):
+    ball_with_match = dataset.current().ball_with_match
+
     # Filter the dataframe for the specified batsman and season.
     df = ball_with_match[(ball_with_match['batter'] == batsman) & (ball_with_match['Season'] == int(season)) & (ball_with_match['innings'].isin([1, 2]))]
 
@@ -799,6 +864,8 @@ def batsmanSeasonAPI(batsman, season):
     return json.dumps(data, cls=NpEncoder)
 
 def bowlerAllSeasonsAPI(bowler):
+    ball_with_match = dataset.current().ball_with_match
+
     # Filter the dataframe for the specified bowler.
     df = ball_with_match[ball_with_match['bowler'] == bowler]
 
@@ -887,6 +954,8 @@ def bowlerAllSeasonsAPI(bowler):
     return json.dumps(data, cls=NpEncoder)
 
 def bowlerSeasonAPI(bowler, season):
+    ball_with_match = dataset.current().ball_with_match
+
     # Filter the dataframe for the specified bowler and season.
     df = ball_with_match[(ball_with_match['bowler'] == bowler) & (ball_with_match['Season'] == int(season))]
 
@@ -936,8 +1005,8 @@ def bowlerSeasonAPI(bowler, season):
     # Calculate the number of Player of the Match awards won by the bowler during the specified season.
     total_mom = df[df.Player_of_Match == bowler].drop_duplicates('ID', keep='first').shape[0]
 
-    # Identify the team the bowler played for during the specified season.
-    bowling_team = df[df['Team1'] != df['BattingTeam']]['Team1'].unique()[0]
+    # Identify the team the bowler played for during the specified season: the fielding side of their first delivery.
+    bowling_team = np.where(df['Team1'] != df['BattingTeam'], df['Team1'], df['Team2'])[0]
     teams = sorted(set(df[df['Team1'] != bowling_team]['Team1'].tolist() + df[df['Team2'] != bowling_team]['Team2'].tolist()))
 
     # Calculate wickets taken against each team during the specified season.
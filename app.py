@@ -1,10 +1,116 @@
 # Import necessary modules from Flask and API.
-from flask import Flask, request
-import api
+import json
+import os
+from urllib.parse import urlencode
+from flask import Flask, request, Response
+import admission
+import coalesce
+import compression
+import formats
+import startup
+
+# Choose the storage backend at startup: 'pandas' (default) keeps the datasets in memory,
+# 'sqlite' answers the core endpoints from the indexed database built by sqlbackend.py.
+# The backend modules are imported by the background loader, not here, so the app binds immediately.
+BACKEND = os.environ.get('IPL_BACKEND', 'pandas')
+if BACKEND == 'sqlite':
+    MODULES = ['sqlbackend']
+    api = startup.LazyModule('sqlbackend')
+    tables = api
+    store = api
+else:
+    MODULES = ['api', 'tables', 'matchups', 'phases', 'form', 'venues', 'query', 'search', 'compare', 'chase']
+    api = startup.LazyModule('api')
+    tables = startup.LazyModule('tables')
+    store = startup.LazyModule('dataset')
+
+# Concurrent identical API calls (e.g. a burst of /api/allseasons on a cold cache) share one computation.
+api = coalesce.CoalescedModule(api, version=lambda: store.version())
 
 # Initialize Flask application.
 app = Flask(__name__)
 
+# Cache responses and serve them gzip/brotli compressed according to Accept-Encoding.
+# Entries are keyed by dataset version, so a reload invalidates them.
+response_cache = compression.enableCompression(app, version=lambda: store.version())
+
+# The analytics endpoints need the in-memory frames, so only the pandas backend serves them.
+if BACKEND == 'pandas':
+    from analytics import analytics
+    app.register_blueprint(analytics)
+
+
+# Paths requested once loading finishes, so the heaviest responses are cached before the instance reports ready.
+def warmPaths():
+    paths = ['/api/allseasons', '/api/batsmenperallseasons', '/api/bowlersperallseasons']
+    if BACKEND == 'pandas':
+        catalog = store.current().catalog
+        paths += ['/api/season?' + urlencode({'season': season}) for season in catalog.seasons]
+        paths += ['/api/teamallseasons?' + urlencode({'team': team}) for team in catalog.teams]
+        paths += ['/api/venues']
+    return paths
+
+
+# Load the datasets, build the indexes and warm the caches in the background.
+loader = startup.Loader(app, MODULES, warmPaths, load=(lambda: store.current()) if BACKEND == 'pandas' else None).start()
+
+
+# Build the next dataset version from the files on disk, swap it in, drop the old version's cached
+# responses and warm the new one. Calls already running finish on the version they started with.
+def reloadDataset():
+    store.reload()
+    response_cache.clear()
+    startup.warm(app, warmPaths())
+
+
+reloader = startup.Reloader(reloadDataset, lambda: store.version())
+
+# Reloads are accepted with this token in the X-Reload-Token header or, when it is unset, from localhost only.
+RELOAD_TOKEN = os.environ.get('IPL_RELOAD_TOKEN')
+
+# Seconds a client is asked to wait before retrying while the instance is still loading.
+RETRY_AFTER = 5
+
+# Until the loader is done, answer API requests with 503 instead of blocking on the load.
+@app.before_request
+def requireReady():
+    if loader.ready or loader.warming or request.path in ('/healthz', '/readyz'):
+        return None
+    response = Response(json.dumps({'error': 'Service is loading'}), status=503, mimetype='application/json')
+    response.headers['Retry-After'] = str(RETRY_AFTER)
+    return response
+
+# Bound concurrent requests per endpoint cost class, shedding load with 503 when a class is saturated.
+# Registered after the cache and readiness hooks, so cache hits and loading rejections skip it.
+if admission.ENABLED:
+    admission.enableAdmission(app)
+
+# Define an endpoint for liveness: the process is up, and the loader has not failed.
+@app.route('/healthz')
+def healthz():
+    data = {'health': {'alive': not loader.failed, 'error': loader.error}}
+    return Response(json.dumps(data), status=500 if loader.failed else 200, mimetype='application/json')
+
+# Define an endpoint for readiness: 200 once data, indexes and caches are warm, 503 with progress until then.
+@app.route('/readyz')
+def readyz():
+    data = {'readiness': dict(loader.status(), dataset=reloader.status())}
+    return Response(json.dumps(data), status=200 if loader.ready else 503, mimetype='application/json')
+
+# Define an endpoint to reload the dataset in the background with zero downtime.
+@app.route('/admin/reload', methods=['POST'])
+def reload():
+    if RELOAD_TOKEN is not None:
+        authorized = request.headers.get('X-Reload-Token') == RELOAD_TOKEN
+    else:
+        authorized = request.remote_addr in ('127.0.0.1', '::1')
+    if not authorized:
+        return Response(json.dumps({'error': 'Not authorized to reload'}), status=403, mimetype='application/json')
+
+    started = reloader.start()
+    data = {'reload': dict(reloader.status(), started=started)}
+    return Response(json.dumps(data), status=202, mimetype='application/json')
+
 # Define an endpoint to get teams for a particular season.
 @app.route('/api/teamsperseason')
 def teamsPerSeason():
@@ -102,6 +208,9 @@ def teamVsTeamSeason():
 @app.route('/api/batsmanallseasons')
 def batsmanAllSeasons():
     batsman = request.args.get('batsman')
+    fmt = request.args.get('format')  # Optional tabular format: 'csv', 'ndjson' or 'arrow'.
+    if fmt:
+        return formats.tabularResponse(tables.batsmanAllSeasonsTable(batsman), fmt)
     response = api.batsmanAllSeasonsAPI(batsman)
     return response
 
@@ -110,6 +219,9 @@ def batsmanAllSeasons():
 def batsmanSeason():
     batsman = request.args.get('batsman')
     season = request.args.get('season')
+    fmt = request.args.get('format')
+    if fmt:
+        return formats.tabularResponse(tables.batsmanSeasonTable(batsman, season), fmt)
     response = api.batsmanSeasonAPI(batsman, season)
     return response
 
@@ -117,6 +229,9 @@ def batsmanSeason():
 @app.route('/api/bowlerallseasons')
 def bowlerAllSeasons():
     bowler = request.args.get('bowler')
+    fmt = request.args.get('format')
+    if fmt:
+        return formats.tabularResponse(tables.bowlerAllSeasonsTable(bowler), fmt)
     response = api.bowlerAllSeasonsAPI(bowler)
     return response
 
@@ -125,6 +240,9 @@ def bowlerAllSeasons():
 def bowlerSeason():
     bowler = request.args.get('bowler')
     season = request.args.get('season')
+    fmt = request.args.get('format')
+    if fmt:
+        return formats.tabularResponse(tables.bowlerSeasonTable(bowler, season), fmt)
     response = api.bowlerSeasonAPI(bowler, season)
     return response
 
@@ -0,0 +1,36 @@
+# Necessary imports: pandas for building the dimension catalogs.
+import pandas as pd
+
+
+# Sorted dimensions (seasons, teams, players) and membership lists built once from the deliveries, so the
+# list endpoints are dictionary lookups instead of a scan of the whole frame per call.
+class Catalog:
+    def __init__(self, df):
+        # Sorted dimensions.
+        self.seasons = sorted(df['Season'].unique().tolist())
+        self.teams = sorted(set(df['Team1'].unique().tolist() + df['Team2'].unique().tolist()))
+        self.batsmen = sorted(df['batter'].unique())
+        self.bowlers = sorted(df['bowler'].unique())
+
+        # Season x team: teams listed as Team1 in each season.
+        self.season_teams = self.sortedMembers(df[['Season', 'Team1']].drop_duplicates(), 'Season', 'Team1')
+
+        # Season x player: batsmen and bowlers who appeared in each season.
+        self.season_batsmen = self.sortedMembers(df[['Season', 'batter']].drop_duplicates(), 'Season', 'batter')
+        self.season_bowlers = self.sortedMembers(df[['Season', 'bowler']].drop_duplicates(), 'Season', 'bowler')
+
+        # Team x opponent: teams that batted against a team, overall and per season.
+        innings_df = df[['Season', 'ID', 'Team1', 'Team2', 'BattingTeam']].drop_duplicates()
+        opponents = []
+        for team_col in ['Team1', 'Team2']:
+            temp_df = innings_df[innings_df['BattingTeam'] != innings_df[team_col]]
+            opponents.append(pd.DataFrame({'Season': temp_df['Season'], 'team': temp_df[team_col], 'opponent': temp_df['BattingTeam']}))
+        opponents = pd.concat(opponents)
+
+        self.team_opponents = self.sortedMembers(opponents[['team', 'opponent']].drop_duplicates(), 'team', 'opponent')
+        self.season_team_opponents = self.sortedMembers(opponents.drop_duplicates(), ['Season', 'team'], 'opponent')
+
+    # Map every key to the sorted list of distinct member values.
+    @staticmethod
+    def sortedMembers(df, key, member):
+        return {name: sorted(group.unique().tolist()) for name, group in df.groupby(key)[member]}
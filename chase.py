@@ -0,0 +1,203 @@
+# Necessary imports: numpy for the lookup table, pandas for walking the innings, and json for JSON encoding.
+import numpy as np
+import pandas as pd
+import json
+
+import dataset
+from encoder import NpEncoder
+
+# Table bounds: runs needed above MAX_RUNS share the last row; a chase has 120 legal balls and 10 wickets.
+MAX_RUNS = 300
+TOTAL_BALLS = 120
+TOTAL_WICKETS = 10
+
+# Smoothing for sparse cells: each cell's win rate is shrunk, with PRIOR_WEIGHT pseudo-chases, towards the rate
+# of its (runs, balls, wickets) neighbourhood within NEIGHBOURHOOD either side, which is in turn shrunk towards
+# a logistic model of the whole table. Well-observed cells keep their own rate; unseen ones follow the model.
+PRIOR_WEIGHT = 5.0
+NEIGHBOURHOOD = (2, 2, 0)
+
+# Newton iterations for fitting the logistic model.
+FIT_ITERATIONS = 25
+
+
+# Sum of each cell's clipped (runs, balls, wickets) neighbourhood, for every cell at once, from a summed-area table.
+def boxSums(values, window):
+    table = np.zeros(tuple(size + 1 for size in values.shape))
+    table[1:, 1:, 1:] = values.cumsum(0).cumsum(1).cumsum(2)
+
+    bounds = []
+    for size, reach in zip(values.shape, window):
+        index = np.arange(size)
+        bounds.append((np.clip(index - reach, 0, size), np.clip(index + reach + 1, 0, size)))
+    (r0, r1), (b0, b1), (w0, w1) = bounds
+    r0, r1 = r0[:, None, None], r1[:, None, None]
+    b0, b1 = b0[None, :, None], b1[None, :, None]
+    w0, w1 = w0[None, None, :], w1[None, None, :]
+
+    return (table[r1, b1, w1] - table[r0, b1, w1] - table[r1, b0, w1] - table[r1, b1, w0]
+            + table[r0, b0, w1] + table[r0, b1, w0] + table[r1, b0, w0] - table[r0, b0, w0])
+
+
+# Win-probability lookup table for second innings, indexed by (runs needed, balls remaining, wickets in hand),
+# plus the state after every delivery of every chase for whole-match curves.
+class ChaseTable:
+    def __init__(self, df):
+        # Second innings in chronological ball order, with the target set by the first innings.
+        df = df[df['innings'].isin([1, 2])].sort_values(['ID', 'innings', 'overs', 'ballnumber'], kind='stable')
+        targets = df[df['innings'] == 1].groupby('ID')['total_run'].sum() + 1
+        chase = df[(df['innings'] == 2) & df['ID'].isin(targets.index)]
+
+        ids = chase['ID'].to_numpy()
+        starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+        ends = np.r_[starts[1:], len(ids)]
+        self.match_rows = {match_id: (start, end) for match_id, start, end in zip(ids[starts].tolist(), starts, ends)}
+
+        # State after each delivery.
+        legal = (~chase['extra_type'].isin(['wides', 'noballs'])).to_numpy().astype(np.int64)
+        runs = chase['total_run'].to_numpy()
+        wickets = chase['isWicketDelivery'].to_numpy()
+        runs_scored = self.cumulative(runs, starts, ends)
+        balls_bowled = self.cumulative(legal, starts, ends)
+        wickets_lost = self.cumulative(wickets, starts, ends)
+
+        self.target = targets.reindex(ids).to_numpy()
+        self.runs_needed = self.target - runs_scored
+        self.balls_remaining = np.maximum(TOTAL_BALLS - balls_bowled, 0)
+        self.wickets_in_hand = np.maximum(TOTAL_WICKETS - wickets_lost, 0)
+        self.labels = (chase['overs'].astype(str) + '.' + chase['ballnumber'].astype(str)).to_numpy()
+        self.batting_teams = chase['BattingTeam'].to_numpy()
+        self.bowling_teams = np.where(chase['Team1'] == chase['BattingTeam'], chase['Team2'], chase['Team1'])
+        self.winners = chase['WinningTeam'].to_numpy()
+
+        # Outcome of each chase: won 1, tied 0.5, lost 0. Abandoned and D/L matches are left out of the table.
+        completed = ((chase['WonBy'] != 'NoResults') & (chase['method'] != 'D/L')).to_numpy()
+        outcome = np.where(chase['WonBy'] == 'SuperOver', 0.5, (chase['WinningTeam'] == chase['BattingTeam']).astype(float))
+
+        # Each delivery is observed in the state before it: the start of the chase, or the state after the previous ball.
+        first = np.zeros(len(ids), dtype=bool)
+        first[starts] = True
+        before_runs = np.where(first, self.target, np.r_[0, self.runs_needed[:-1]])
+        before_balls = np.where(first, TOTAL_BALLS, np.r_[0, self.balls_remaining[:-1]])
+        before_wickets = np.where(first, TOTAL_WICKETS, np.r_[0, self.wickets_in_hand[:-1]])
+
+        observed = completed & (before_runs > 0)
+        cells = (np.minimum(before_runs[observed], MAX_RUNS), before_balls[observed], before_wickets[observed])
+        shape = (MAX_RUNS + 1, TOTAL_BALLS + 1, TOTAL_WICKETS + 1)
+        self.chases = np.zeros(shape)
+        self.wins = np.zeros(shape)
+        self.won = np.zeros(shape, dtype=np.int64)
+        np.add.at(self.chases, cells, 1)
+        np.add.at(self.wins, cells, outcome[observed])
+        np.add.at(self.won, cells, outcome[observed] == 1)
+        self.probability = self.smooth(self.chases, self.wins)
+
+    # Running totals within each match.
+    @staticmethod
+    def cumulative(values, starts, ends):
+        totals = np.cumsum(values)
+        offsets = np.r_[0, totals[:-1]][starts]
+        return totals - np.repeat(offsets, ends - starts)
+
+    # Features of the logistic model for states (runs needed, balls remaining, wickets in hand).
+    @staticmethod
+    def features(runs, balls, wickets):
+        runs, balls, wickets = (np.asarray(value, dtype=float) for value in (runs, balls, wickets))
+        required_rate = runs / np.maximum(balls, 1) * 6
+        return np.stack([np.ones_like(runs), np.minimum(required_rate, 36), np.log1p(runs), np.log1p(balls),
+                         wickets, wickets * balls / TOTAL_BALLS], axis=-1)
+
+    # Fit the logistic model to the table's cells, weighted by how often each was observed (IRLS with a small ridge).
+    @classmethod
+    def fitModel(cls, chases, wins):
+        cells = np.nonzero(chases)
+        x = cls.features(*cells)
+        n, y = chases[cells], wins[cells] / chases[cells]
+        coefficients = np.zeros(x.shape[1])
+        for _ in range(FIT_ITERATIONS):
+            p = 1 / (1 + np.exp(-x @ coefficients))
+            weights = n * p * (1 - p) + 1e-9
+            hessian = x.T @ (x * weights[:, None]) + 1e-3 * np.eye(x.shape[1])
+            coefficients += np.linalg.solve(hessian, x.T @ (n * (y - p)))
+        return coefficients
+
+    # Shrink every cell towards its neighbourhood's win rate, itself shrunk towards the logistic model.
+    @classmethod
+    def smooth(cls, chases, wins):
+        coefficients = cls.fitModel(chases, wins)
+        grid = np.meshgrid(*(np.arange(size) for size in chases.shape), indexing='ij')
+        model = 1 / (1 + np.exp(-cls.features(*grid) @ coefficients))
+
+        prior = (boxSums(wins, NEIGHBOURHOOD) + PRIOR_WEIGHT * model) / (boxSums(chases, NEIGHBOURHOOD) + PRIOR_WEIGHT)
+        probability = (wins + PRIOR_WEIGHT * prior) / (chases + PRIOR_WEIGHT)
+
+        # Settled states: nothing needed is a win; no balls or wickets left with runs needed is a loss.
+        probability[0] = 1.0
+        probability[1:, 0, :] = 0.0
+        probability[1:, :, 0] = 0.0
+        return probability.astype(np.float32)
+
+    # Table cell of a state, or raise ValueError if it is not a valid chase state.
+    def cell(self, runs, balls, wickets):
+        if not 0 <= balls <= TOTAL_BALLS or not 0 <= wickets <= TOTAL_WICKETS:
+            raise ValueError(f'Invalid chase state: {balls} balls, {wickets} wickets')
+        return min(max(runs, 0), MAX_RUNS), balls, wickets
+
+
+# Build the chase table once per dataset snapshot.
+dataset.register('chase_table', lambda snapshot: ChaseTable(snapshot.ball_with_match))
+
+
+# Function to look up how often teams in a chase state went on to win. Raises ValueError for an invalid state.
+def chaseAPI(runs, balls, wickets):
+    chase_table = dataset.current().chase_table
+    try:
+        runs, balls, wickets = int(runs), int(balls), int(wickets)
+    except (TypeError, ValueError):
+        raise ValueError(f'Invalid chase state: runs={runs}, balls={balls}, wickets={wickets}') from None
+    cell = chase_table.cell(runs, balls, wickets)
+
+    data = {
+        'chase': {
+            'runsNeeded': runs,
+            'ballsRemaining': balls,
+            'wicketsInHand': wickets,
+            'winProbability': round(float(chase_table.probability[cell]) * 100, 2),
+            'chases': int(chase_table.chases[cell]),
+            'won': int(chase_table.won[cell])
+        }
+    }
+
+    return json.dumps(data, cls=NpEncoder)
+
+
+# Function to retrieve the chasing team's win-probability curve, ball by ball, for a historical match.
+# Raises KeyError for a match without a chase in the data.
+def winProbabilityAPI(match_id):
+    chase_table = dataset.current().chase_table
+    try:
+        start, end = chase_table.match_rows[int(match_id)]
+    except (TypeError, ValueError, KeyError):
+        raise KeyError(f'Unknown match: {match_id}') from None
+
+    runs = np.r_[chase_table.target[start], chase_table.runs_needed[start:end]]
+    balls = np.r_[TOTAL_BALLS, chase_table.balls_remaining[start:end]]
+    wickets = np.r_[TOTAL_WICKETS, chase_table.wickets_in_hand[start:end]]
+    probability = chase_table.probability[np.clip(runs, 0, MAX_RUNS), balls, wickets]
+
+    data = {
+        'winProbability': {
+            'id': int(match_id),
+            'battingTeam': chase_table.batting_teams[start],
+            'bowlingTeam': chase_table.bowling_teams[start],
+            'target': chase_table.target[start],
+            'winningTeam': chase_table.winners[start] if not pd.isna(chase_table.winners[start]) else None,
+            'balls': ['0.0'] + chase_table.labels[start:end].tolist(),
+            'runsNeeded': runs.tolist(),
+            'ballsRemaining': balls.tolist(),
+            'wicketsInHand': wickets.tolist(),
+            'probability': np.round(probability.astype(float) * 100, 2).tolist()
+        }
+    }
+
+    return json.dumps(data, cls=NpEncoder)
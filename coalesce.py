@@ -0,0 +1,89 @@
+# Necessary imports: inspect for normalizing call arguments and threading for the in-flight table.
+import inspect
+import threading
+
+
+# One in-flight computation: followers wait on the event and then read the leader's result or error.
+class Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+# Single-flight coalescing: concurrent calls with the same key share one computation. The first caller
+# (the leader) runs the function; everyone arriving while it runs waits and gets the same result, or the
+# same exception. Nothing is kept once the flight lands, so a later call computes afresh.
+class SingleFlight:
+    def __init__(self):
+        self.flights = {}
+        self.lock = threading.Lock()
+
+    def do(self, key, function):
+        with self.lock:
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[key] = Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = function()
+        except Exception as error:
+            flight.error = error
+            raise
+        finally:
+            with self.lock:
+                del self.flights[key]
+            flight.done.set()
+        return flight.result
+
+    # Number of computations currently in flight.
+    def inFlight(self):
+        with self.lock:
+            return len(self.flights)
+
+
+# Key for a call with defaults filled in, so f('CSK') and f(team='CSK') share a flight.
+def callKey(function, signature, args, kwargs):
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    return (function.__name__, tuple(bound.arguments.items()))
+
+
+# Wrap a function so that concurrent identical calls are coalesced through the given flights. With a version
+# callable, calls against different dataset versions never share a flight.
+def coalesced(function, flights, version=None):
+    signature = inspect.signature(function)
+
+    def wrapper(*args, **kwargs):
+        key = callKey(function, signature, args, kwargs)
+        if version is not None:
+            key = (version(),) + key
+        return flights.do(key, lambda: function(*args, **kwargs))
+
+    wrapper.__name__ = function.__name__
+    wrapper.__doc__ = function.__doc__
+    return wrapper
+
+
+# Stand-in for an API module whose public functions are coalesced; other attributes pass straight through.
+class CoalescedModule:
+    def __init__(self, module, flights=None, version=None):
+        self.module = module
+        self.flights = flights if flights is not None else SingleFlight()
+        self.version = version
+        self.wrapped = {}
+
+    def __getattr__(self, name):
+        attribute = getattr(self.module, name)
+        if name.startswith('_') or not inspect.isfunction(attribute):
+            return attribute
+        if name not in self.wrapped:
+            self.wrapped[name] = coalesced(attribute, self.flights, self.version)
+        return self.wrapped[name]
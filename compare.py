@@ -0,0 +1,191 @@
+# Necessary imports: json for JSON encoding.
+import json
+
+import dataset
+from encoder import NpEncoder
+
+
+# Seasons to compare: a comma-separated list, or every season in the data when none are given.
+# Raises ValueError for a season that is not a number or not in the data.
+def parseSeasons(seasons, available):
+    if not seasons:
+        return list(available)
+    try:
+        requested = [int(season) for season in str(seasons).split(',') if season.strip()]
+    except ValueError:
+        raise ValueError(f'Invalid seasons: {seasons}') from None
+    unknown = sorted(set(requested) - set(available))
+    if unknown:
+        raise ValueError(f'Unknown seasons: {unknown}')
+    return requested
+
+
+# Top row of one season's slice of a grouped series, as (first key, value). Every metric is reduced once for all
+# seasons with a groupby keyed by Season; this helper and the two below pick from one season's slice, which holds
+# the same keys in the same order as the single-season endpoints' groupby, so the same sort picks the same rows
+# (ties included).
+def best(grouped, season):
+    top = grouped.loc[season].sort_values(ascending=False).head(1)
+    return top.index[0][0], top.values[0]
+
+
+# Top 5 of one season's slice of a grouped series, as (names, values).
+def topFive(grouped, season):
+    top = grouped.loc[season].sort_values(ascending=False).head()
+    return top.index.tolist(), top.values.tolist()
+
+
+# Highest and lowest innings totals of one season, as (team, score, team, score).
+def scoreRange(scores, season):
+    season_scores = scores.loc[season]
+    highest = season_scores.sort_values(ascending=False)
+    lowest = season_scores.sort_values()
+    return highest.index[0][-1], highest.values[0], lowest.index[0][-1], lowest.values[0]
+
+
+# Innings totals of completed regular innings, keyed by Season, ID, innings and BattingTeam.
+def inningsScores(df):
+    df = df[(df['WonBy'] != 'NoResults') & (df['method'] != 'D/L') & (df['innings'].isin([1, 2]))]
+    return df.groupby(['Season', 'ID', 'innings', 'BattingTeam'])['total_run'].sum()
+
+
+# Count of distinct matches in each of the given seasons, 0 for seasons without any.
+def matchCounts(df, seasons):
+    return df.groupby('Season')['ID'].nunique().reindex(seasons, fill_value=0)
+
+
+# Function to compare the overall season metrics of several seasons in one response.
+def seasonsCompareAPI(seasons=None):
+    snapshot = dataset.current()
+    df, catalog = snapshot.ball_with_match, snapshot.catalog
+    seasons = parseSeasons(seasons, catalog.seasons)
+    df = df[df['Season'].isin(seasons)]
+
+    # Grouped reductions for all requested seasons at once.
+    matches_played = matchCounts(df, seasons)
+    teams_played = df.groupby('Season')['Team1'].nunique()
+    super_overs_played = matchCounts(df[df['SuperOver'] == 'Y'], seasons)
+    match_runs = df.groupby(['Season', 'batter', 'ID'])['batsman_run'].sum()
+    match_wickets = df.groupby(['Season', 'bowler', 'ID'])['isWicketDelivery'].sum()
+    scores = inningsScores(df)
+    season_runs = df.groupby(['Season', 'batter'])['batsman_run'].sum()
+    season_wickets = df.groupby(['Season', 'bowler'])['isWicketDelivery'].sum()
+    champions = df[df['MatchNumber'] == 'Final'].groupby('Season')['WinningTeam'].first()
+
+    results = []
+    for season in seasons:
+        highest_runs_batsman_name, highest_runs = best(match_runs, season)
+        highest_wickets_bowler_name, highest_wickets = best(match_wickets, season)
+        highest_team_score_name, highest_team_score, lowest_team_score_name, lowest_team_score = scoreRange(scores, season)
+        top_5_batsmen_names, top_5_batsmen_runs = topFive(season_runs, season)
+        top_5_bowlers_names, top_5_bowlers_wickets = topFive(season_wickets, season)
+
+        results.append({
+            'totalMatchesPlayed': matches_played[season],
+            'totalTeamsPlayed': teams_played[season],
+            'totalSuperOverPlayed': super_overs_played[season],
+            'highestRunsBatsmanName': highest_runs_batsman_name,
+            'highestRuns': highest_runs,
+            'highestWicketsBowlerName': highest_wickets_bowler_name,
+            'highestWickets': highest_wickets,
+            'highesTeamScoreName': highest_team_score_name,
+            'highesTeamScore': highest_team_score,
+            'lowestTeamScoreName': lowest_team_score_name,
+            'lowestTeamScore': lowest_team_score,
+            'playingTeams': {
+                'names': catalog.season_teams[season]
+            },
+            'top5Batsmen': {
+                'names': top_5_batsmen_names,
+                'runs': top_5_batsmen_runs
+            },
+            'top5Bowlers': {
+                'names': top_5_bowlers_names,
+                'wickets': top_5_bowlers_wickets
+            },
+            'winningTeam': champions[season]
+        })
+
+    data = {
+        'seasonsCompare': {
+            'seasons': seasons,
+            'overallSeason': results
+        }
+    }
+
+    return json.dumps(data, cls=NpEncoder)
+
+
+# Function to compare a team's season metrics across several seasons in one response.
+def teamSeasonsCompareAPI(team, seasons=None):
+    ball_with_match = dataset.current().ball_with_match
+
+    # The team's matches, then its own innings and the opposition's innings against it.
+    df = ball_with_match[(ball_with_match['Team1'] == team) | (ball_with_match['Team2'] == team)]
+    seasons = parseSeasons(seasons, sorted(df['Season'].unique().tolist()))
+    df = df[df['Season'].isin(seasons)]
+    batting = df[df['BattingTeam'] == team]
+    opposition = df[df['BattingTeam'] != team]
+
+    # Grouped reductions for all requested seasons at once.
+    matches_played = matchCounts(df, seasons)
+    super_overs_played = matchCounts(df[df['SuperOver'] == 'Y'], seasons)
+    titles_won = matchCounts(df[(df['MatchNumber'] == 'Final') & (df['WinningTeam'] == team)], seasons)
+    matches_won = matchCounts(df[df['WinningTeam'] == team], seasons)
+    matches_draw = matchCounts(df[df['WinningTeam'].isnull()], seasons)
+    match_runs = batting.groupby(['Season', 'batter', 'ID'])['batsman_run'].sum()
+    match_wickets = opposition.groupby(['Season', 'bowler', 'ID'])['isWicketDelivery'].sum()
+    scores = inningsScores(batting)
+    season_runs = batting.groupby(['Season', 'batter'])['batsman_run'].sum()
+    season_wickets = opposition.groupby(['Season', 'bowler'])['isWicketDelivery'].sum()
+    batsmen = batting.groupby('Season')['batter'].unique()
+    bowlers = opposition.groupby('Season')['bowler'].unique()
+
+    results = []
+    for season in seasons:
+        highest_runs_batsman_name, highest_runs = best(match_runs, season)
+        highest_wickets_bowler_name, highest_wickets = best(match_wickets, season)
+        highest_score_name, highest_score, lowest_score_name, lowest_score = scoreRange(scores, season)
+        top_5_batsmen_names, top_5_batsmen_runs = topFive(season_runs, season)
+        top_5_bowlers_names, top_5_bowlers_wickets = topFive(season_wickets, season)
+        won, draw = matches_won[season], matches_draw[season]
+
+        results.append({
+            'totalMatchesPlayed': matches_played[season],
+            'totalSuperOverPlayed': super_overs_played[season],
+            'titlesWon': titles_won[season],
+            'highestRunsBatsmanName': highest_runs_batsman_name,
+            'highestRuns': highest_runs,
+            'highestWicketsBowlerName': highest_wickets_bowler_name,
+            'highestWickets': highest_wickets,
+            'highesScoreName': highest_score_name,
+            'highesScore': highest_score,
+            'lowestScoreName': lowest_score_name,
+            'lowestScore': lowest_score,
+            'players': {
+                'names': sorted(set(batsmen[season].tolist() + bowlers[season].tolist()))
+            },
+            'top5Batsmen': {
+                'names': top_5_batsmen_names,
+                'runs': top_5_batsmen_runs
+            },
+            'top5Bowlers': {
+                'names': top_5_bowlers_names,
+                'wickets': top_5_bowlers_wickets
+            },
+            'matchesWinDrawLoss': {
+                'matchesWon': won,
+                'matchesDraw': draw,
+                'matchesLoss': matches_played[season] - won - draw
+            }
+        })
+
+    data = {
+        'teamSeasonsCompare': {
+            'team': team,
+            'seasons': seasons,
+            'teamSeason': results
+        }
+    }
+
+    return json.dumps(data, cls=NpEncoder)
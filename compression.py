@@ -0,0 +1,154 @@
+# Necessary imports: gzip for compression, threading for the cache lock, and flask for the request hooks.
+import gzip
+import threading
+from collections import OrderedDict
+
+from flask import g, request, Response
+
+# Brotli is optional; without it only gzip is offered.
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are not worth compressing.
+MIN_COMPRESS_SIZE = 512
+
+# Maximum number of responses kept in the cache.
+CACHE_SIZE = 1024
+
+# Only API responses are cached; health and readiness checks must always be answered live.
+CACHE_PREFIX = '/api/'
+
+
+# Compressors by content coding, in order of preference.
+def compressors():
+    available = {}
+    if brotli is not None:
+        available['br'] = lambda body: brotli.compress(body, quality=11)
+    available['gzip'] = lambda body: gzip.compress(body, compresslevel=9)
+    return available
+
+
+COMPRESSORS = compressors()
+
+
+# Pick the encoding the client accepts with the highest q-value from an Accept-Encoding header, or None for
+# identity. Ties go to the server's order of preference; an explicit identity with a higher q-value wins.
+def negotiateEncoding(accept_encoding):
+    accepted = {}
+    for part in (accept_encoding or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding] = quality
+
+    best, best_quality = None, 0.0
+    for coding in COMPRESSORS:
+        quality = accepted.get(coding, accepted.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    if accepted.get('identity', 0.0) > best_quality:
+        return None
+    return best
+
+
+# One cached response: the identity body plus every compressed variant produced so far.
+class CachedResponse:
+    def __init__(self, body, mimetype):
+        self.mimetype = mimetype
+        self.bodies = {None: body}
+        self.lock = threading.Lock()
+
+    # Body for the given encoding, compressing it on first use only.
+    def body(self, encoding):
+        if encoding is None or len(self.bodies[None]) < MIN_COMPRESS_SIZE:
+            return None, self.bodies[None]
+        if encoding not in self.bodies:
+            with self.lock:
+                if encoding not in self.bodies:
+                    self.bodies[encoding] = COMPRESSORS[encoding](self.bodies[None])
+        return encoding, self.bodies[encoding]
+
+
+# LRU cache of successful GET responses keyed by dataset version, path and sorted query parameters.
+class ResponseCache:
+    def __init__(self, size=CACHE_SIZE):
+        self.size = size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(version, path, args):
+        return version, path, tuple(sorted(args.items(multi=True)))
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+# Build the response for a cached entry, negotiated against the request's Accept-Encoding.
+def negotiatedResponse(entry):
+    encoding, body = entry.body(negotiateEncoding(request.headers.get('Accept-Encoding')))
+    response = Response(body, mimetype=entry.mimetype)
+    if encoding is not None:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+
+# Serve API responses from the cache, compressed once per encoding, and cache every new successful response.
+# The optional version callable returns the dataset version; it is read before the request is handled, so a
+# response computed from an older dataset is never served once a newer one is swapped in.
+def enableCompression(app, cache=None, version=None):
+    cache = cache if cache is not None else ResponseCache()
+    app.extensions['response_cache'] = cache
+
+    @app.before_request
+    def serveCached():
+        if request.method != 'GET' or not request.path.startswith(CACHE_PREFIX):
+            return None
+        g.cache_key = ResponseCache.key(version() if version is not None else None, request.path, request.args)
+        entry = cache.get(g.cache_key)
+        if entry is not None:
+            g.served_from_cache = True
+            return negotiatedResponse(entry)
+        return None
+
+    @app.after_request
+    def cacheResponse(response):
+        # Skip cache hits, errors, streamed bodies and responses that are already encoded.
+        if g.get('served_from_cache') or request.method != 'GET' or response.status_code != 200:
+            return response
+        if 'cache_key' not in g:
+            return response
+        if response.is_streamed or 'Content-Encoding' in response.headers:
+            return response
+
+        entry = CachedResponse(response.get_data(), response.mimetype)
+        cache.put(g.cache_key, entry)
+        return negotiatedResponse(entry)
+
+    return cache
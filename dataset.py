@@ -0,0 +1,90 @@
+# Necessary imports: pandas for loading the datasets, threading for the swap and reload locks, and time for timestamps.
+import threading
+import time
+
+import pandas as pd
+
+from catalog import Catalog
+
+# Serving-format datasets, as written by etl.py.
+DELIVERIES_CSV = 'datasets/ball_with_match_cleaned.csv'
+MATCHES_CSV = 'datasets/matches_cleaned.csv'
+
+# Derived structures (indexes, cubes, lookup tables) by name, each built from a snapshot by its builder.
+builders = {}
+
+
+# Register a derived structure, built for every snapshot and read as an attribute of it, e.g. snapshot.matchup_index.
+def register(name, builder):
+    builders[name] = builder
+
+
+# One immutable version of the data: the frames, the catalog and every registered derived structure.
+# API functions fetch the current snapshot once per call and read only from it, so a call that started
+# before a reload finishes on the version it started with.
+class Snapshot:
+    def __init__(self, version, ball_with_match, matches):
+        self.version = version
+        self.loaded_at = time.time()
+        self.ball_with_match = ball_with_match
+        self.matches = matches
+        self.catalog = Catalog(ball_with_match)
+        self.derived = {}
+        self.lock = threading.Lock()
+
+    # Build every registered structure not built yet.
+    def build(self):
+        for name in list(builders):
+            self.get(name)
+        return self
+
+    def get(self, name):
+        if name not in self.derived:
+            with self.lock:
+                if name not in self.derived:
+                    self.derived[name] = builders[name](self)
+        return self.derived[name]
+
+    # Structures registered after the snapshot was built (e.g. by a module imported later) are built on first use.
+    def __getattr__(self, name):
+        if name in builders:
+            return self.get(name)
+        raise AttributeError(name)
+
+
+# Read the datasets and build a complete snapshot.
+def load(version, deliveries_csv=DELIVERIES_CSV, matches_csv=MATCHES_CSV):
+    ball_with_match = pd.read_csv(deliveries_csv)
+    matches = pd.read_csv(matches_csv)
+    return Snapshot(version, ball_with_match, matches).build()
+
+
+snapshot = None
+swap_lock = threading.Lock()
+reload_lock = threading.Lock()
+
+
+# The snapshot API calls read from; the first call loads version 1.
+def current():
+    global snapshot
+    if snapshot is None:
+        with swap_lock:
+            if snapshot is None:
+                snapshot = load(1, DELIVERIES_CSV, MATCHES_CSV)
+    return snapshot
+
+
+# Version of the current snapshot, or 0 before the first load.
+def version():
+    return snapshot.version if snapshot is not None else 0
+
+
+# Build the next version from the datasets on disk and swap it in. The old snapshot stays valid for the
+# calls still using it. Reloads run one at a time; returns the new snapshot.
+def reload():
+    global snapshot
+    with reload_lock:
+        new_snapshot = load(version() + 1, DELIVERIES_CSV, MATCHES_CSV)
+        with swap_lock:
+            snapshot = new_snapshot
+    return new_snapshot